@@ -2,28 +2,151 @@
 
 from __future__ import annotations
 
-import io
-from typing import List
+import pickle
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from threading import Lock
+from typing import Any, List, Tuple
 
 import streamlit as st
 from dotenv import load_dotenv
 
 from eduweave.config import AppConfig, ChunkConfig, RetrievalConfig
 from eduweave.experiment_tracker import log_experiment
-from eduweave.generation import generate_mcqs, generate_summary
-from eduweave.pdf_utils import combine_texts, extract_text_from_pdf
-from eduweave.rag import answer_question
-from eduweave.text_processing import chunk_text_with_metadata
-from eduweave.vector_store import VectorStoreManager
+from eduweave.generation import generate_mcqs, stream_summary
+from eduweave.pdf_utils import combine_texts, extract_texts_from_pdfs
+from eduweave.rag import AnswerResponse, stream_answer
+from eduweave.text_processing import ChunkColumns, chunk_text_columns
+from eduweave.vector_store import VectorStoreManager, corpus_fingerprint
 
 load_dotenv()
 
 APP_CONFIG = AppConfig()
+# Missing, truncated or incompatible saved indexes are rebuilt rather than surfaced.
+_LOAD_ERRORS = (OSError, EOFError, RuntimeError, ValueError, KeyError, pickle.UnpicklingError)
+
+
+def _new_vector_store() -> VectorStoreManager:
+    return VectorStoreManager(
+        APP_CONFIG.embedding_model,
+        batch_size=APP_CONFIG.embedding_batch_size,
+        cache_dir=Path(APP_CONFIG.embedding_cache_dir),
+        cache_max_entries=APP_CONFIG.embedding_cache_max_entries,
+        onnx_export_dir=Path(APP_CONFIG.onnx_export_dir),
+    )
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _build_vector_store(
+    fingerprint: str,
+    _chunks: List[str],
+    _metadata: ChunkColumns,
+    _full_text: str,
+) -> VectorStoreManager:
+    """Build (or reuse) the index for a corpus; only ``fingerprint`` is hashed by Streamlit.
+
+    An index saved earlier for the same fingerprint is loaded instead of re-embedded;
+    a freshly built one is saved once, so a cache hit never rewrites the files.
+    """
+    vector_store = _new_vector_store()
+    saved = Path(APP_CONFIG.vector_store_dir) / f"{fingerprint}.faiss"
+    if saved.exists():
+        try:
+            vector_store.load(saved)
+            return vector_store
+        except _LOAD_ERRORS:
+            pass
+    vector_store.build(_chunks, _metadata)
+    vector_store.full_text = _full_text
+    try:
+        vector_store.save(APP_CONFIG.vector_store_dir)
+    except OSError:
+        pass  # the in-memory index still works; it just is not reused after a restart
+    _prune_saved_indexes()
+    return vector_store
+
+
+def _saved_indexes() -> List[Path]:
+    """Saved ``*.faiss`` files, oldest first."""
+    return sorted(Path(APP_CONFIG.vector_store_dir).glob("*.faiss"), key=lambda path: path.stat().st_mtime)
+
+
+def _prune_saved_indexes() -> None:
+    """Keep only the newest ``max_saved_indexes`` corpora on disk."""
+    for index_path in _saved_indexes()[: -max(APP_CONFIG.max_saved_indexes, 1)]:
+        try:
+            index_path.unlink()
+            index_path.with_suffix(".pkl").unlink(missing_ok=True)
+        except OSError:
+            pass  # still mapped by another session on Windows; retried on the next build
+
+
+def _retrieval_config(top_k: int) -> RetrievalConfig:
+    return RetrievalConfig(
+        top_k=top_k,
+        max_k=APP_CONFIG.retrieval.max_k,
+        ef_search=APP_CONFIG.retrieval.ef_search,
+    )
+
+
+class _AnswerCache:
+    """LRU of finished answers shared by all sessions; unlike ``st.cache_data`` it can be peeked."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Tuple[Any, ...], AnswerResponse] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Tuple[Any, ...]) -> AnswerResponse | None:
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+            return response
+
+    def put(self, key: Tuple[Any, ...], response: AnswerResponse) -> None:
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@st.cache_resource(show_spinner=False)
+def _answer_cache() -> _AnswerCache:
+    """Answers per corpus; the vector store itself is identified by ``corpus_hash``."""
+    return _AnswerCache()
+
+
+def _restore_vector_store() -> VectorStoreManager | None:
+    """Reload the most recently saved index so a server restart skips re-embedding.
+
+    Opt-in via ``AppConfig.restore_last_index``: saved indexes are shared by every
+    session, so on a multi-user server this would open another user's documents.
+    """
+    if not APP_CONFIG.restore_last_index:
+        return None
+    saved = _saved_indexes()
+    if not saved:
+        return None
+    vector_store = _new_vector_store()
+    try:
+        vector_store.load(saved[-1])
+    except _LOAD_ERRORS:
+        return None
+    return vector_store
 
 
 def init_state() -> None:
     if "vector_store" not in st.session_state:
-        st.session_state.vector_store = None
+        vector_store = _restore_vector_store()
+        st.session_state.vector_store = vector_store
+        if vector_store:
+            sources = (meta.get("source") for meta in vector_store.metadatas)
+            st.session_state.corpus_text = vector_store.get_full_text()
+            st.session_state.document_names = list(dict.fromkeys(source for source in sources if source))
     if "corpus_text" not in st.session_state:
         st.session_state.corpus_text = ""
     if "document_names" not in st.session_state:
@@ -70,12 +193,12 @@ def upload_tab() -> None:
         doc_names: List[str] = []
 
         with st.spinner("Extracting text from PDFs..."):
-            for file in uploaded_files:
-                data = file.read()
-                text = extract_text_from_pdf(io.BytesIO(data), filename=file.name)
+            # UploadedFile objects are not picklable, so read bytes here before fanning out.
+            items = [(file.name, file.read()) for file in uploaded_files]
+            for (name, _), text in zip(items, extract_texts_from_pdfs(items)):
                 if text:
                     pdf_texts.append(text)
-                    doc_names.append(file.name)
+                    doc_names.append(name)
 
         if not pdf_texts:
             st.error("No extractable text found in the uploaded PDFs.")
@@ -87,22 +210,25 @@ def upload_tab() -> None:
             separators=APP_CONFIG.chunk.separators,
         )
 
-        all_chunks: List[str] = []
-        all_meta = []
-        for name, text in zip(doc_names, pdf_texts):
-            chunks, metadata = chunk_text_with_metadata(text, chunk_config, source=name)
-            all_chunks.extend(chunks)
-            all_meta.extend(metadata)
+        with ThreadPoolExecutor(max_workers=min(8, len(doc_names))) as executor:
+            results = list(
+                executor.map(
+                    lambda item: chunk_text_columns(item[1], chunk_config, source=item[0]),
+                    zip(doc_names, pdf_texts),
+                )
+            )
+        all_chunks: List[str] = list(chain.from_iterable(chunks for chunks, _ in results))
+        all_meta = ChunkColumns.concat([columns for _, columns in results])
 
         st.write(f"Prepared {len(all_chunks)} chunks from {len(pdf_texts)} documents.")
 
         with st.spinner("Creating embeddings and FAISS index..."):
-            vector_store = VectorStoreManager(APP_CONFIG.embedding_model)
-            vector_store.build(all_chunks, all_meta)
-            vector_store.full_text = combine_texts(pdf_texts)
+            fingerprint = corpus_fingerprint(all_chunks, APP_CONFIG.embedding_model)
+            full_text = combine_texts(pdf_texts, force_clean=False)
+            vector_store = _build_vector_store(fingerprint, all_chunks, all_meta, full_text)
 
         st.session_state.vector_store = vector_store
-        st.session_state.corpus_text = vector_store.full_text
+        st.session_state.corpus_text = vector_store.get_full_text()
         st.session_state.document_names = doc_names
 
         if record_logs:
@@ -133,32 +259,42 @@ def qa_tab() -> None:
         if not question.strip():
             st.warning("Enter a question first.")
             return
+        st.markdown("**Answer:**")
+        answer_slot = st.empty()
         try:
-            retrieval_cfg = RetrievalConfig(
-                top_k=top_k,
-                max_k=APP_CONFIG.retrieval.max_k,
-                distance_cutoff=APP_CONFIG.retrieval.distance_cutoff,
-            )
-            response = answer_question(
-                question,
-                st.session_state.vector_store,
-                retrieval_cfg,
-                APP_CONFIG.generation,
-                use_rag=use_rag,
-                temperature=temperature,
-            )
+            vector_store: VectorStoreManager = st.session_state.vector_store
+            # Reuse a finished low-temperature answer for this or a near-duplicate question if
+            # there is one; otherwise stream the raw generation, then show the cleaned answer.
+            cache_key = (question.strip(), vector_store.corpus_hash, top_k, temperature, use_rag)
+            cacheable = temperature <= APP_CONFIG.generation.max_cached_temperature
+            response = _answer_cache().get(cache_key) if cacheable else None
+            if response is None:
+                stream = stream_answer(
+                    question.strip(),
+                    vector_store,
+                    _retrieval_config(top_k),
+                    APP_CONFIG.generation,
+                    use_rag=use_rag,
+                    temperature=temperature,
+                )
+                if stream.answer is not None:  # a near-duplicate question was already answered
+                    response = AnswerResponse(answer=stream.answer, sources=stream.sources, mode=stream.mode)
+                else:
+                    response = stream.finish(answer_slot.write_stream(stream.tokens))
+                if cacheable:
+                    _answer_cache().put(cache_key, response)
         except Exception as exc:
+            answer_slot.empty()
             st.error(f"Failed to get answer: {exc}")
             return
 
-        st.markdown("**Answer:**")
-        st.write(response.answer)
+        answer_slot.write(response.answer)
         if response.sources:
             with st.expander("Retrieved context"):
                 for source in response.sources:
                     meta = source.get("metadata", {})
                     label = meta.get("source", "chunk")
-                    st.markdown(f"**{label}** - distance {source.get('distance', 0):.4f}")
+                    st.markdown(f"**{label}** - similarity {source.get('score', 0):.4f}")
                     st.caption(source["text"])
 
         st.success(f"Answered using {'RAG' if response.mode == 'rag' else 'baseline'} mode.")
@@ -179,13 +315,12 @@ def summary_tab() -> None:
         return
     temperature = st.slider("Summary temperature", 0.0, 0.8, APP_CONFIG.generation.summary_temperature, step=0.05)
     if st.button("Generate summary"):
+        st.markdown("### Summary")
         try:
-            summary = generate_summary(st.session_state.corpus_text, APP_CONFIG.generation, temperature=temperature)
+            st.write_stream(stream_summary(st.session_state.corpus_text, APP_CONFIG.generation, temperature=temperature))
         except Exception as exc:
             st.error(f"Failed to create summary: {exc}")
             return
-        st.markdown("### Summary")
-        st.write(summary)
         note = st.text_area("Notes about this summary run", key="summary_note")
         if st.button("Log summary run"):
             log_experiment(
@@ -1,20 +1,36 @@
-"""EduWeave package exports."""
-
-from .config import AppConfig, ChunkConfig, RetrievalConfig, GenerationConfig
-from .pdf_utils import extract_text_from_pdf, combine_texts
-from .text_processing import chunk_text
-from .vector_store import VectorStoreManager
-from .local_llm import get_text_generator, LocalTextGenerator
-
-__all__ = [
-    "AppConfig",
-    "ChunkConfig",
-    "RetrievalConfig",
-    "GenerationConfig",
-    "extract_text_from_pdf",
-    "combine_texts",
-    "chunk_text",
-    "VectorStoreManager",
-    "LocalTextGenerator",
-    "get_text_generator",
-]
+"""EduWeave package exports.
+
+Exports are resolved lazily so light modules such as ``eduweave.pdf_utils`` (imported
+by spawned PDF extraction workers) do not pull in torch and transformers.
+"""
+
+from importlib import import_module
+from typing import Any
+
+_EXPORTS = {
+    "AppConfig": ".config",
+    "ChunkConfig": ".config",
+    "RetrievalConfig": ".config",
+    "GenerationConfig": ".config",
+    "extract_text_from_pdf": ".pdf_utils",
+    "extract_texts_from_pdfs": ".pdf_utils",
+    "combine_texts": ".pdf_utils",
+    "chunk_text": ".text_processing",
+    "VectorStoreManager": ".vector_store",
+    "LocalTextGenerator": ".local_llm",
+    "get_text_generator": ".local_llm",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(__all__)
@@ -14,6 +14,7 @@ class ChunkConfig:
     chunk_overlap: int = 150
     min_chunk_size: int = 200
     separators: Tuple[str, ...] = ("\n\n", "\n", ". ", " ", "")
+    respect_separators: bool = False  # opt into boundary-aware splits instead of fixed strides
 
 
 @dataclass
@@ -22,7 +23,7 @@ class RetrievalConfig:
 
     top_k: int = 5
     max_k: int = 8
-    distance_cutoff: float = 1.5
+    ef_search: int = 64
 
 
 @dataclass
@@ -41,6 +42,8 @@ class GenerationConfig:
     answer_max_tokens: int = 256
     summary_max_tokens: int = 300
     mcq_max_tokens: int = 350
+    max_cached_temperature: float = 0.5  # answers above this temperature are never served from cache
+    quantize: bool = True  # 4-bit NF4 weights; only applied when CUDA + bitsandbytes are available
 
 
 @dataclass
@@ -49,6 +52,13 @@ class AppConfig:
 
     project_title: str = "EduWeave - AI Study Copilot for PDFs"
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_batch_size: int = 64
+    vector_store_dir: str = "data/vector_store"
+    max_saved_indexes: int = 4  # oldest saved corpora beyond this are deleted
+    restore_last_index: bool = False  # single-user setups: new sessions reopen the last uploaded corpus
+    embedding_cache_dir: str = "data/embedding_cache"
+    onnx_export_dir: str = "data/onnx"  # only used by the "onnx" embedding backend
+    embedding_cache_max_entries: int = 100_000  # least recently used chunk embeddings beyond this are deleted
     chunk: ChunkConfig = field(default_factory=ChunkConfig)
     retrieval: RetrievalConfig = field(default_factory=RetrievalConfig)
     generation: GenerationConfig = field(default_factory=GenerationConfig)
@@ -2,9 +2,33 @@
 
 from __future__ import annotations
 
+import atexit
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict
+from typing import Dict, TextIO
+
+# Append handles stay open for the process lifetime; Streamlit reruns reuse them.
+_LOG_HANDLES: Dict[Path, TextIO] = {}
+_LOG_LOCK = threading.Lock()
+
+
+def _log_handle(path: Path) -> TextIO:
+    key = path.resolve()
+    handle = _LOG_HANDLES.get(key)
+    if handle is None or handle.closed:
+        key.parent.mkdir(parents=True, exist_ok=True)
+        handle = key.open("a", encoding="utf-8")
+        _LOG_HANDLES[key] = handle
+    return handle
+
+
+@atexit.register
+def _close_log_handles() -> None:
+    with _LOG_LOCK:
+        for handle in _LOG_HANDLES.values():
+            handle.close()
+        _LOG_HANDLES.clear()
 
 
 def log_experiment(
@@ -24,6 +48,7 @@ def log_experiment(
         f"**Observation:** {observation.strip() or 'n/a'}\n\n"
         "---\n"
     )
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as handle:
+    with _LOG_LOCK:
+        handle = _log_handle(path)
         handle.write(entry)
+        handle.flush()
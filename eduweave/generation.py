@@ -2,30 +2,32 @@
 
 from __future__ import annotations
 
-import json
+import math
 import re
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Tuple
+
+import orjson
 
 from .config import GenerationConfig
 from .local_llm import get_text_generator
 
+_RE_WHITESPACE = re.compile(r"\s+")
+MCQS_PER_PROMPT = 5
+SUMMARY_SYSTEM_PROMPT = "You write concise, structured study notes.\n"
+MCQ_SYSTEM_PROMPT = "You design rigorous but fair multiple-choice questions.\n"
+
 
 def _clean_context(text: str, limit: int) -> str:
-    text = re.sub(r"\s+", " ", text or "").strip()
+    text = _RE_WHITESPACE.sub(" ", text or "").strip()
     return text[:limit]
 
 
-def generate_summary(
-    corpus_text: str,
-    config: GenerationConfig,
-    temperature: float | None = None,
-) -> str:
-    """Generate a structured summary suitable for engineering students."""
+def _summary_prompt(corpus_text: str, config: GenerationConfig) -> str:
     context = _clean_context(corpus_text, config.max_summary_chars)
     if not context:
         raise ValueError("No text available for summarization.")
 
-    prompt = f"""Source material:
+    return f"""Source material:
 {context}
 
 Produce a concise study summary with:
@@ -34,26 +36,41 @@ Produce a concise study summary with:
 - highlight critical formulas or definitions if present.
 Keep the tone friendly and academic."""
 
-    generator = get_text_generator(config.summary_model)
+
+def generate_summary(
+    corpus_text: str,
+    config: GenerationConfig,
+    temperature: float | None = None,
+) -> str:
+    """Generate a structured summary suitable for engineering students."""
+    prompt = _summary_prompt(corpus_text, config)
+    generator = get_text_generator(config.summary_model, quantize=config.quantize)
     return generator.generate(
-        prompt="You write concise, structured study notes.\n" + prompt,
+        prompt=prompt,
+        system_prompt=SUMMARY_SYSTEM_PROMPT,
         temperature=temperature or config.summary_temperature,
         max_new_tokens=config.summary_max_tokens,
     )
 
 
-def generate_mcqs(
+def stream_summary(
     corpus_text: str,
-    num_questions: int,
     config: GenerationConfig,
     temperature: float | None = None,
-) -> Tuple[List[Dict[str, Any]], str]:
-    """Generate MCQs plus a fallback raw response."""
-    context = _clean_context(corpus_text, config.max_mcq_chars)
-    if not context:
-        raise ValueError("No text available for MCQ generation.")
+) -> Iterator[str]:
+    """Streaming variant of :func:`generate_summary` yielding text as it is generated."""
+    prompt = _summary_prompt(corpus_text, config)
+    generator = get_text_generator(config.summary_model, quantize=config.quantize)
+    return generator.stream(
+        prompt=prompt,
+        system_prompt=SUMMARY_SYSTEM_PROMPT,
+        temperature=temperature or config.summary_temperature,
+        max_new_tokens=config.summary_max_tokens,
+    )
 
-    prompt = f"""Use the material below to create {num_questions} engineering-style MCQs.
+
+def _mcq_prompt(context: str, num_questions: int) -> str:
+    return f"""Use the material below to create {num_questions} engineering-style MCQs.
 
 Material:
 {context}
@@ -69,18 +86,52 @@ Return valid JSON with this schema:
 ]
 Include varied concepts and avoid trivia."""
 
-    generator = get_text_generator(config.mcq_model)
-    raw_output = generator.generate(
-        prompt="You design rigorous but fair multiple-choice questions.\n" + prompt,
+
+def _parse_mcqs(raw_output: str) -> List[Dict[str, Any]] | None:
+    # Models often wrap the array in prose or code fences; parse only the outermost [...] block.
+    start, end = raw_output.find("["), raw_output.rfind("]")
+    if start == -1 or end <= start:
+        return None
+    try:
+        parsed = orjson.loads(raw_output[start : end + 1])
+    except orjson.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, list) else None
+
+
+def generate_mcqs(
+    corpus_text: str,
+    num_questions: int,
+    config: GenerationConfig,
+    temperature: float | None = None,
+) -> Tuple[List[Dict[str, Any]], str]:
+    """Generate MCQs plus a fallback raw response.
+
+    Requests above ``MCQS_PER_PROMPT`` questions are split into smaller prompts,
+    each over its own slice of the material, and generated as one batch.
+    """
+    batches = max(1, math.ceil(num_questions / MCQS_PER_PROMPT))
+    context = _clean_context(corpus_text, config.max_mcq_chars * batches)
+    if not context:
+        raise ValueError("No text available for MCQ generation.")
+
+    slice_len = math.ceil(len(context) / batches)
+    counts = [num_questions // batches + (1 if i < num_questions % batches else 0) for i in range(batches)]
+    prompts = [
+        _mcq_prompt(context[i * slice_len : (i + 1) * slice_len], count)
+        for i, count in enumerate(counts)
+        if count
+    ]
+
+    generator = get_text_generator(config.mcq_model, quantize=config.quantize)
+    raw_outputs = generator.generate_batch(
+        prompts,
         temperature=temperature or config.mcq_temperature,
         max_new_tokens=config.mcq_max_tokens,
+        system_prompt=MCQ_SYSTEM_PROMPT,
     )
 
-    try:
-        parsed = json.loads(raw_output)
-        if isinstance(parsed, list):
-            return parsed, raw_output
-    except json.JSONDecodeError:
-        pass
-
-    return [], raw_output
+    questions: List[Dict[str, Any]] = []
+    for raw in raw_outputs:
+        questions.extend(_parse_mcqs(raw) or [])
+    return questions[:num_questions], "\n\n".join(raw_outputs)
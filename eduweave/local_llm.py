@@ -2,53 +2,263 @@
 
 from __future__ import annotations
 
+import copy
+import importlib.util
+from collections import OrderedDict
 from functools import lru_cache
-from typing import Optional
+from threading import Event, Lock, Thread
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+import torch
+from transformers import (
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    DynamicCache,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer,
+)
+
+
+def _can_quantize() -> bool:
+    """4-bit loading needs bitsandbytes, which only ships CUDA kernels."""
+    return torch.cuda.is_available() and importlib.util.find_spec("bitsandbytes") is not None
+
+
+def _can_use_flash_attention() -> bool:
+    """FlashAttention-2 needs the flash_attn package and an Ampere-or-newer GPU."""
+    return (
+        torch.cuda.is_available()
+        and torch.cuda.get_device_capability()[0] >= 8
+        and importlib.util.find_spec("flash_attn") is not None
+    )
+
+
+class _StopOnEvent(StoppingCriteria):
+    """Stop generation once ``event`` is set, e.g. when a stream consumer goes away."""
+
+    def __init__(self, event: Event):
+        self.event = event
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
 
 
 class LocalTextGenerator:
-    """Wrap a text2text-generation pipeline with sane defaults."""
+    """Wrap a causal LM with sane defaults and reusable system-prompt KV caches."""
 
-    def __init__(self, model_name: str, device: Optional[int | str] = None):
+    def __init__(
+        self,
+        model_name: str,
+        device: Optional[int | str] = None,
+        quantize: bool = False,
+        max_prefixes: int = 4,
+    ):
         self.model_name = model_name
         self.device = device
-        self._pipeline = None
+        self.quantize = quantize
+        self.max_prefixes = max_prefixes  # Q&A, summary and MCQ share one generator, each with its own prompt
+        self._model = None
+        self._tokenizer = None
+        self._prefixes: OrderedDict[str, Tuple[torch.Tensor, Any]] = OrderedDict()
+        self._prefixes_lock = Lock()  # Streamlit sessions share one generator across threads
+
+    def _model_kwargs(self) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {"low_cpu_mem_usage": True}
+        gpu_map = {"": self.device if self.device is not None else 0}
+        fast_attention = _can_use_flash_attention()
+        if self.quantize and _can_quantize():
+            from transformers import BitsAndBytesConfig
+
+            kwargs["device_map"] = gpu_map
+            kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_compute_dtype=torch.bfloat16,
+            )
+        elif fast_attention:
+            kwargs["device_map"] = gpu_map
+            kwargs["torch_dtype"] = torch.bfloat16
+        else:
+            kwargs["device_map"] = {"": "cpu"}  # keep everything on CPU to avoid meta/offload issues
+            kwargs["torch_dtype"] = "auto"
+        if fast_attention:
+            kwargs["attn_implementation"] = "flash_attention_2"
+        return kwargs
 
     def _load(self):
-        if self._pipeline is None:
+        if self._model is None:
             tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            model = AutoModelForCausalLM.from_pretrained(
-                self.model_name,
-                device_map={"": "cpu"},  # keep everything on CPU to avoid meta/offload issues
-                torch_dtype="auto",
-                low_cpu_mem_usage=True,
-            )
-            self._pipeline = pipeline(
-                "text-generation",
-                model=model,
-                tokenizer=tokenizer,
-            )
-        return self._pipeline
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            # Decoder-only models must be left-padded so batched generation continues from real tokens.
+            tokenizer.padding_side = "left"
+            model = AutoModelForCausalLM.from_pretrained(self.model_name, **self._model_kwargs())
+            model.eval()
+            # No torch.compile here: the DynamicCache grows every decode step, so a compiled
+            # forward recompiles per sequence length, and Phi-3 has no static-cache support
+            # in the pinned transformers release.
+            self._tokenizer = tokenizer
+            self._model = model
+        return self._model, self._tokenizer
 
-    def generate(self, prompt: str, temperature: float, max_new_tokens: int) -> str:
-        generator = self._load()
+    def _prefix_cache(self, system_prompt: str, batch_size: int = 1):
+        """Return the system prompt's token ids and a private copy of its KV cache.
+
+        The prefill runs once per distinct system prompt (the last ``max_prefixes``
+        are kept); callers get a copy, repeated ``batch_size`` times, because
+        ``generate`` extends the cache in place.
+        """
+        model, tokenizer = self._load()
+        with self._prefixes_lock:
+            cached = self._prefixes.get(system_prompt)
+            if cached is not None:
+                self._prefixes.move_to_end(system_prompt)
+        if cached is None:
+            input_ids = tokenizer(system_prompt, return_tensors="pt").input_ids.to(model.device)
+            with torch.inference_mode():
+                past = model(input_ids=input_ids, past_key_values=DynamicCache(), use_cache=True).past_key_values
+            cached = (input_ids, past)
+            with self._prefixes_lock:
+                self._prefixes[system_prompt] = cached
+                while len(self._prefixes) > max(self.max_prefixes, 1):
+                    self._prefixes.popitem(last=False)
+        past = copy.deepcopy(cached[1])
+        if batch_size > 1:
+            past.batch_repeat_interleave(batch_size)
+        return cached[0], past
+
+    def _decode_new_tokens(self, output: torch.Tensor, prompt_length: int) -> str:
+        return self._tokenizer.decode(output[prompt_length:], skip_special_tokens=True).strip()
+
+    @staticmethod
+    def _sampling_kwargs(temperature: float, max_new_tokens: int) -> dict:
         temperature = max(0.01, min(temperature, 2.0))
-        generation = generator(
-            prompt,
-            max_new_tokens=max_new_tokens,
-            do_sample=temperature > 0.05,
-            temperature=temperature,
-            num_return_sequences=1,
+        return {
+            "max_new_tokens": max_new_tokens,
+            "do_sample": temperature > 0.05,
+            "temperature": temperature,
+            "num_return_sequences": 1,
+        }
+
+    def _prepare_inputs(self, prompt: str, system_prompt: Optional[str]) -> Tuple[torch.Tensor, Any]:
+        model, tokenizer = self._load()
+        if not system_prompt:
+            return tokenizer(prompt, return_tensors="pt").input_ids.to(model.device), None
+        prefix_ids, past_key_values = self._prefix_cache(system_prompt)
+        user_ids = tokenizer(prompt, add_special_tokens=False, return_tensors="pt").input_ids.to(model.device)
+        return torch.cat([prefix_ids, user_ids], dim=-1), past_key_values
+
+    def _generate_kwargs(
+        self,
+        prompt: str,
+        temperature: float,
+        max_new_tokens: int,
+        system_prompt: Optional[str],
+    ) -> Dict[str, Any]:
+        input_ids, past_key_values = self._prepare_inputs(prompt, system_prompt)
+        return {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            "past_key_values": past_key_values,
+            "pad_token_id": self._tokenizer.pad_token_id,
+            **self._sampling_kwargs(temperature, max_new_tokens),
+        }
+
+    def generate(
+        self,
+        prompt: str,
+        temperature: float,
+        max_new_tokens: int,
+        system_prompt: Optional[str] = None,
+    ) -> str:
+        """Generate a completion; ``system_prompt`` prefixes the prompt and has its KV cache reused."""
+        kwargs = self._generate_kwargs(prompt, temperature, max_new_tokens, system_prompt)
+        with torch.inference_mode():
+            output = self._model.generate(**kwargs)
+        return self._decode_new_tokens(output[0], kwargs["input_ids"].shape[-1])
+
+    def stream(
+        self,
+        prompt: str,
+        temperature: float,
+        max_new_tokens: int,
+        system_prompt: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Like :meth:`generate`, but yield decoded text pieces as tokens arrive.
+
+        Errors raised by ``generate`` in the worker thread are re-raised here once the
+        stream ends; closing the iterator early stops generation at the next token.
+        """
+        kwargs = self._generate_kwargs(prompt, temperature, max_new_tokens, system_prompt)
+        streamer = TextIteratorStreamer(self._tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stop = Event()
+        errors: List[BaseException] = []
+
+        def _run() -> None:
+            try:
+                # inference_mode is thread-local, so enter it inside the worker thread.
+                with torch.inference_mode():
+                    self._model.generate(
+                        **kwargs,
+                        streamer=streamer,
+                        stopping_criteria=StoppingCriteriaList([_StopOnEvent(stop)]),
+                    )
+            except BaseException as exc:  # surfaced to the consumer below
+                errors.append(exc)
+            finally:
+                streamer.end()  # unblocks the consumer even when generate() failed
+
+        worker = Thread(target=_run, daemon=True)
+        worker.start()
+        try:
+            yield from streamer
+        finally:
+            stop.set()
+            worker.join()
+        if errors:
+            raise errors[0]
+
+    def generate_batch(
+        self,
+        prompts: List[str],
+        temperature: float,
+        max_new_tokens: int,
+        system_prompt: Optional[str] = None,
+    ) -> List[str]:
+        """Run several independent prompts through the model in one padded batch.
+
+        With ``system_prompt`` every row starts from its cached KV prefix; the prompts are
+        left-padded after it, and the attention mask keeps those pads out of attention and
+        position ids.
+        """
+        if not prompts:
+            return []
+        model, tokenizer = self._load()
+        encoded = tokenizer(prompts, add_special_tokens=not system_prompt, return_tensors="pt", padding=True).to(
+            model.device
         )
-        result = generation[0]
-        text = result.get("generated_text")
-        if text is None:
-            text = result.get("summary_text", "")
-        return (text or "").strip()
+        input_ids, attention_mask, past_key_values = encoded["input_ids"], encoded["attention_mask"], None
+        if system_prompt:
+            prefix_ids, past_key_values = self._prefix_cache(system_prompt, batch_size=len(prompts))
+            input_ids = torch.cat([prefix_ids.expand(len(prompts), -1), input_ids], dim=-1)
+            attention_mask = torch.cat([torch.ones_like(prefix_ids).expand(len(prompts), -1), attention_mask], dim=-1)
+        with torch.inference_mode():
+            output = model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=past_key_values,
+                pad_token_id=tokenizer.pad_token_id,
+                **self._sampling_kwargs(temperature, max_new_tokens),
+            )
+        prompt_length = input_ids.shape[-1]
+        return [self._decode_new_tokens(row, prompt_length) for row in output]
 
 
 @lru_cache(maxsize=3)
-def get_text_generator(model_name: str, device: Optional[int | str] = None) -> LocalTextGenerator:
-    return LocalTextGenerator(model_name=model_name, device=device)
+def get_text_generator(
+    model_name: str,
+    device: Optional[int | str] = None,
+    quantize: bool = False,
+) -> LocalTextGenerator:
+    return LocalTextGenerator(model_name=model_name, device=device, quantize=quantize)
@@ -3,10 +3,22 @@
 from __future__ import annotations
 
 import io
+import multiprocessing
+import os
 import re
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
 
-from pypdf import PdfReader
+import fitz
+
+_RE_CRLF = re.compile(r"\r\n?")
+_RE_SPACES = re.compile(r"[ \t]+")
+_RE_NL = re.compile(r"\n{3,}")
+
+# Spawning a worker costs roughly what extracting a few MB of PDF does, so smaller
+# uploads are extracted in-process and large ones use at most this many workers.
+_PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+_MAX_WORKERS = 4
 
 
 def clean_text(text: str) -> str:
@@ -14,29 +26,61 @@ def clean_text(text: str) -> str:
     if not text:
         return ""
     text = text.replace("\x00", " ")
-    text = re.sub(r"\r\n?", "\n", text)
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _RE_CRLF.sub("\n", text)
+    text = _RE_SPACES.sub(" ", text)
+    text = _RE_NL.sub("\n\n", text)
     return text.strip()
 
 
 def extract_text_from_pdf(file_obj: io.BytesIO, filename: str | None = None) -> str:
     """Extract readable text from each page of the uploaded PDF stream."""
-    reader = PdfReader(file_obj)
+    label = filename or "PDF"
+    try:
+        document = fitz.open(stream=file_obj.read(), filetype="pdf")
+    except Exception as exc:  # pragma: no cover - PyMuPDF raises various errors
+        raise RuntimeError(f"Failed to open {label}: {exc}") from exc
+
     pages = []
-    for number, page in enumerate(reader.pages, start=1):
-        try:
-            raw = page.extract_text() or ""
-        except Exception as exc:  # pragma: no cover - pypdf raises various errors
-            label = f"{filename or 'PDF'} page {number}"
-            raise RuntimeError(f"Failed to extract text from {label}: {exc}") from exc
-        cleaned = clean_text(raw)
-        if cleaned:
-            pages.append(cleaned)
+    with document:
+        for number, page in enumerate(document, start=1):
+            try:
+                raw = page.get_text("text") or ""
+            except Exception as exc:  # pragma: no cover - PyMuPDF raises various errors
+                raise RuntimeError(f"Failed to extract text from {label} page {number}: {exc}") from exc
+            cleaned = clean_text(raw)
+            if cleaned:
+                pages.append(cleaned)
     return "\n\n".join(pages)
 
 
-def combine_texts(texts: List[str]) -> str:
-    """Join multiple PDF texts into a single corpus string."""
-    cleaned = [clean_text(text) for text in texts if text]
-    return "\n\n".join(chunk for chunk in cleaned if chunk)
+def _extract_worker(item: Tuple[str, bytes]) -> str:
+    name, data = item
+    return extract_text_from_pdf(io.BytesIO(data), filename=name)
+
+
+def extract_texts_from_pdfs(
+    items: Sequence[Tuple[str, bytes]],
+    max_workers: Optional[int] = None,
+) -> List[str]:
+    """Extract text from several ``(filename, bytes)`` PDFs, one process per file.
+
+    Results keep the input order. Single files and uploads under
+    ``_PARALLEL_MIN_BYTES`` are handled in-process to skip the pool start-up cost.
+    """
+    workers = min(max_workers or _MAX_WORKERS, os.cpu_count() or 1, len(items))
+    if workers <= 1 or sum(len(data) for _, data in items) < _PARALLEL_MIN_BYTES:
+        return [_extract_worker(item) for item in items]
+    # Spawn, not fork: the host process is multithreaded (Streamlit, torch, tokenizers).
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return list(executor.map(_extract_worker, items))
+
+
+def combine_texts(texts: List[str], force_clean: bool = False) -> str:
+    """Join multiple PDF texts into a single corpus string.
+
+    Output of :func:`extract_text_from_pdf` is already cleaned, so ``clean_text``
+    only runs again when ``force_clean`` is set.
+    """
+    if force_clean:
+        texts = [clean_text(text) for text in texts if text]
+    return "\n\n".join(text for text in texts if text)
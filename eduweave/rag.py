@@ -2,14 +2,19 @@
 
 from __future__ import annotations
 
-import textwrap
+import io
+import re
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from .config import GenerationConfig, RetrievalConfig
 from .local_llm import get_text_generator
-from .vector_store import VectorStoreManager
-import re
+from .vector_store import CachedQuery, VectorStoreManager
+
+_RE_ANSWER_SPLIT = re.compile(r"\banswer\s*:\s*", re.IGNORECASE)
+_RE_ECHO_LINE = re.compile(r"\s*(context|question)\s*:", re.IGNORECASE)
+_RE_FORBIDDEN = re.compile(r"EduWeave|AI assistant|Avoid speculation|Keep responses concise", re.IGNORECASE)
+_RE_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
 
 
 @dataclass
@@ -19,40 +24,76 @@ class AnswerResponse:
     mode: str
 
 
+@dataclass
+class AnswerStream:
+    """A Q&A answer in progress: either a reused ``answer`` or raw ``tokens`` still to consume."""
+
+    tokens: Iterator[str]
+    sources: List[Dict[str, Any]]
+    mode: str
+    temperature: float
+    answer: Optional[str] = None  # set when a near-duplicate question's answer is reused
+    cached: Optional[CachedQuery] = None  # cache entry that stores the finished answer
+
+    def finish(self, raw_answer: str) -> AnswerResponse:
+        """Clean the streamed ``raw_answer`` and remember it for near-duplicate questions."""
+        answer = finalize_answer(raw_answer)
+        if self.cached is not None:
+            self.cached.answer, self.cached.temperature = answer, self.temperature
+        return AnswerResponse(answer=answer, sources=self.sources, mode=self.mode)
+
+
 SYSTEM_PROMPT = """You are EduWeave, an academic AI assistant.
 Answer questions strictly with the provided context. Avoid speculation.
 Keep responses concise (one or two sentences) and directly address the question.
 If the answer is missing, say you cannot find it in the supplied notes."""
+_SYSTEM_PREFIX = SYSTEM_PROMPT + "\n"
 
 
 def _format_context(chunks: List[Dict[str, Any]]) -> str:
-    formatted = []
+    buffer = io.StringIO()
     for idx, chunk in enumerate(chunks, start=1):
         metadata = chunk.get("metadata", {})
         source = metadata.get("source", f"chunk-{idx}")
-        formatted.append(f"[{source}] {chunk['text']}")
-    return "\n\n".join(formatted)
+        if idx > 1:
+            buffer.write("\n\n")
+        buffer.write(f"[{source}] ")
+        buffer.write(chunk["text"])
+    return buffer.getvalue()
 
 
-def answer_question(
+def _truncate_context(text: str, limit: int, placeholder: str = " ...") -> str:
+    """Cut ``text`` to ``limit`` characters on a word boundary without scanning the rest."""
+    if len(text) <= limit:
+        return text
+    window = text[: max(limit - len(placeholder), 0)]
+    cut = window.rfind(" ")
+    if cut > 0:
+        window = window[:cut]
+    return window.rstrip() + placeholder
+
+
+def _build_prompt(
     question: str,
     vector_store: Optional[VectorStoreManager],
     retrieval_cfg: RetrievalConfig,
     generation_cfg: GenerationConfig,
-    use_rag: bool = True,
-    temperature: Optional[float] = None,
-) -> AnswerResponse:
-    """Answer a question either by RAG or by querying the raw corpus."""
+    use_rag: bool,
+) -> Tuple[str, List[Dict[str, Any]], str, Optional[CachedQuery]]:
     if not vector_store or not vector_store.is_ready():
         raise RuntimeError("Vector store is not ready. Upload and process PDFs first.")
 
+    cached = None
     if use_rag:
-        hits = vector_store.search(question, top_k=retrieval_cfg.top_k)
+        cached = vector_store.cached_search(question, top_k=retrieval_cfg.top_k, ef_search=retrieval_cfg.ef_search)
+        hits = cached.hits
         context = _format_context(hits)
         mode = "rag"
     else:
         hits = []
-        context = textwrap.shorten(vector_store.full_text, width=generation_cfg.max_context_chars, placeholder=" ...")
+        context = _truncate_context(
+            vector_store.get_full_text(generation_cfg.max_context_chars), generation_cfg.max_context_chars
+        )
         mode = "baseline"
 
     if not context:
@@ -63,38 +104,101 @@ def answer_question(
 
 Question: {question}
 Answer in a single short paragraph that directly addresses the question:"""
+    return prompt, hits, mode, cached
 
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": prompt},
-    ]
 
-    generator = get_text_generator(generation_cfg.answer_model)
-    raw_answer = generator.generate(
-        prompt="\n".join([m["content"] for m in messages]),
-        temperature=temperature or generation_cfg.answer_temperature,
-        max_new_tokens=generation_cfg.answer_max_tokens,
-    )
+def finalize_answer(raw_answer: str) -> str:
+    """Strip echoed prompt text from a raw generation and keep a concise answer."""
     # Prefer the portion after the last "Answer:" marker if the model echoed the prompt.
-    parts = re.split(r"(?i)\banswer\s*:\s*", raw_answer)
+    parts = _RE_ANSWER_SPLIT.split(raw_answer)
     answer_body = parts[-1].strip() if len(parts) > 1 else raw_answer.strip()
 
-    # Drop lines that look like echoed prompt/context.
-    cleaned_lines = []
+    # Drop lines that look like echoed prompt/context and keep up to the first seven
+    # sentences; splitting line by line stops before scanning the rest of a long generation.
+    sentences: List[str] = []
+    pending = ""
     for line in answer_body.splitlines():
-        if re.match(r"(?i)\s*(context|question)\s*:", line):
-            continue
-        if re.search(r"EduWeave|AI assistant|Avoid speculation|Keep responses concise", line, flags=re.IGNORECASE):
+        if _RE_ECHO_LINE.match(line) or _RE_FORBIDDEN.search(line):
             continue
-        cleaned_lines.append(line)
-    cleaned = " ".join(cleaned_lines).strip()
-
-    # Keep up to the first seven sentences to stay concise but informative.
-    sentences = re.split(r"(?<=[.!?])\s+", cleaned)
-    answer = " ".join(sentences[:7]).strip() if sentences else cleaned
+        *complete, pending = _RE_SENTENCE_SPLIT.split(f"{pending} {line}" if pending else line.lstrip())
+        sentences.extend(complete)
+        if len(sentences) >= 7:
+            break
+    else:
+        sentences.append(pending)
+    answer = " ".join(sentences[:7]).strip()
 
     # Fallback if the model echoed instructions instead of answering.
     if not answer or "if the answer is missing" in answer.lower():
         answer = "I cannot find the answer in the supplied notes."
+    return answer
+
 
+def _cache_entry(
+    cached: Optional[CachedQuery], temperature: float, generation_cfg: GenerationConfig
+) -> Optional[CachedQuery]:
+    """``cached`` if answers at ``temperature`` may be stored on it, else ``None``."""
+    if cached is None or temperature > generation_cfg.max_cached_temperature:
+        return None
+    return cached
+
+
+def answer_question(
+    question: str,
+    vector_store: Optional[VectorStoreManager],
+    retrieval_cfg: RetrievalConfig,
+    generation_cfg: GenerationConfig,
+    use_rag: bool = True,
+    temperature: Optional[float] = None,
+) -> AnswerResponse:
+    """Answer a question either by RAG or by querying the raw corpus.
+
+    In RAG mode a near-duplicate of a recent question (see
+    ``VectorStoreManager.cached_search``) reuses its answer at the same temperature.
+    """
+    prompt, hits, mode, cached = _build_prompt(question, vector_store, retrieval_cfg, generation_cfg, use_rag)
+    temperature = temperature or generation_cfg.answer_temperature
+    cached = _cache_entry(cached, temperature, generation_cfg)
+    if cached is not None and cached.answer is not None and cached.temperature == temperature:
+        return AnswerResponse(answer=cached.answer, sources=hits, mode=mode)
+
+    generator = get_text_generator(generation_cfg.answer_model, quantize=generation_cfg.quantize)
+    raw_answer = generator.generate(
+        prompt=prompt,
+        system_prompt=_SYSTEM_PREFIX,
+        temperature=temperature,
+        max_new_tokens=generation_cfg.answer_max_tokens,
+    )
+    answer = finalize_answer(raw_answer)
+    if cached is not None:
+        cached.answer, cached.temperature = answer, temperature
     return AnswerResponse(answer=answer, sources=hits, mode=mode)
+
+
+def stream_answer(
+    question: str,
+    vector_store: Optional[VectorStoreManager],
+    retrieval_cfg: RetrievalConfig,
+    generation_cfg: GenerationConfig,
+    use_rag: bool = True,
+    temperature: Optional[float] = None,
+) -> AnswerStream:
+    """Retrieve context and return the raw token stream, or a near-duplicate's cached answer.
+
+    When ``answer`` is set the stream is empty; otherwise consume ``tokens`` and pass
+    the joined text to :meth:`AnswerStream.finish` for the cleaned answer.
+    """
+    prompt, hits, mode, cached = _build_prompt(question, vector_store, retrieval_cfg, generation_cfg, use_rag)
+    temperature = temperature or generation_cfg.answer_temperature
+    cached = _cache_entry(cached, temperature, generation_cfg)
+    if cached is not None and cached.answer is not None and cached.temperature == temperature:
+        return AnswerStream(iter(()), hits, mode, temperature, answer=cached.answer)
+
+    generator = get_text_generator(generation_cfg.answer_model, quantize=generation_cfg.quantize)
+    tokens = generator.stream(
+        prompt=prompt,
+        system_prompt=_SYSTEM_PREFIX,
+        temperature=temperature,
+        max_new_tokens=generation_cfg.answer_max_tokens,
+    )
+    return AnswerStream(tokens, hits, mode, temperature, cached=cached)
@@ -3,13 +3,36 @@
 from __future__ import annotations
 
 import re
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from .config import ChunkConfig
 
 
+_RE_WHITESPACE = re.compile(r"\s+")
+
+
 def _normalize_whitespace(text: str) -> str:
-    return re.sub(r"\s+", " ", text or "").strip()
+    return _RE_WHITESPACE.sub(" ", text or "").strip()
+
+
+def _iter_normalized(text: str, buf: int = 1 << 20) -> Iterator[str]:
+    """Yield :func:`_normalize_whitespace` output in pieces, reading ``buf`` characters at a time.
+
+    A whitespace run cut by a slice boundary is carried over as one pending space,
+    so the concatenated pieces equal the fully normalized string.
+    """
+    started = pending_space = False
+    for offset in range(0, len(text or ""), buf):
+        piece = _RE_WHITESPACE.sub(" ", text[offset : offset + buf])
+        core = piece.strip()
+        if not core:
+            pending_space = pending_space or bool(piece)
+            continue
+        yield " " + core if started and (pending_space or piece[0] == " ") else core
+        started, pending_space = True, piece[-1] == " "
 
 
 def chunk_text(
@@ -18,63 +41,179 @@ def chunk_text(
     chunk_overlap: int = 150,
     separators: Tuple[str, ...] = ("\n\n", "\n", ". ", " ", ""),
 ) -> List[str]:
-    """Split text into overlapping windows with soft sentence boundaries."""
-    normalized = _normalize_whitespace(text)
-    if not normalized:
-        return []
+    """Split text into overlapping windows with soft sentence boundaries.
 
+    Normalized text is consumed from :func:`_iter_normalized` so only the current
+    window's tail plus one read buffer is held, never the whole normalized document.
+    """
     chunk_size = max(chunk_size, 200)
     chunk_overlap = max(0, min(chunk_overlap, chunk_size - 1))
+    min_boundary = chunk_size * 0.6
+    separators = [(sep, len(sep.strip())) for sep in separators if sep]
+
+    pieces = _iter_normalized(text)
+    buffer, base, exhausted = "", 0, False  # ``buffer`` holds normalized[base : base + len(buffer)]
 
     chunks: List[str] = []
     start = 0
-    length = len(normalized)
 
-    while start < length:
+    while True:
+        if not exhausted and base + len(buffer) <= start + chunk_size:
+            # Keep a window of lookback for overlaps, then read until the next window fits.
+            carry_from = max(base, start - chunk_size)
+            parts = [buffer[carry_from - base :]]
+            size = len(parts[0])
+            for piece in pieces:
+                parts.append(piece)
+                size += len(piece)
+                if carry_from + size > start + chunk_size:
+                    break
+            else:
+                exhausted = True
+            buffer, base = "".join(parts), carry_from
+
+        length = base + len(buffer)  # a lower bound until the input is exhausted
+        if start >= length:
+            break
         end = min(start + chunk_size, length)
-        window = normalized[start:end]
 
         # Try to end the chunk on a natural boundary.
         adjusted_end = end
-        for sep in separators:
-            if not sep:
-                continue
-            idx = window.rfind(sep)
+        for sep, keep in separators:
+            idx = buffer.rfind(sep, start - base, end - base)
             if idx == -1:
                 continue
-            absolute_idx = start + idx + len(sep.strip())
-            if absolute_idx - start >= chunk_size * 0.6:
+            absolute_idx = base + idx + keep
+            if absolute_idx - start >= min_boundary:
                 adjusted_end = absolute_idx
                 break
 
-        chunk = normalized[start:adjusted_end].strip()
+        chunk = buffer[start - base : adjusted_end - base].strip()
         if chunk:
             chunks.append(chunk)
 
-        if adjusted_end >= length:
+        if exhausted and adjusted_end >= length:
             break
 
         start = max(adjusted_end - chunk_overlap, 0)
-        if start >= length:
-            break
 
     return chunks
 
 
-def chunk_text_with_metadata(text: str, chunk_config: ChunkConfig, source: str | None = None):
-    """Return chunk texts alongside lightweight metadata for tracing."""
-    chunks = chunk_text(
-        text,
-        chunk_size=chunk_config.chunk_size,
-        chunk_overlap=chunk_config.chunk_overlap,
-        separators=chunk_config.separators,
-    )
-    metadata = [
-        {
-            "source": source or "document",
-            "chunk_index": index,
-            "char_length": len(chunk),
+def _chunk_by_stride(text: str, chunk_size: int, chunk_overlap: int, min_chunk_size: int):
+    """Fixed windows at ``range(0, len, chunk_size - overlap)`` with no boundary search."""
+    normalized = _normalize_whitespace(text)
+    if not normalized:
+        return [], []
+
+    chunk_size = max(chunk_size, 200)
+    chunk_overlap = max(0, min(chunk_overlap, chunk_size - 1))
+    step = chunk_size - chunk_overlap
+    length = len(normalized)
+    # Stop before a window would start inside the previous window's overlap only.
+    starts = range(0, max(length - chunk_overlap, 1), step)
+    spans = [(s, min(s + chunk_size, length)) for s in starts]
+    # Fold an undersized tail window into the previous one so no trailing text is lost.
+    if len(spans) > 1 and spans[-1][1] - spans[-1][0] < min_chunk_size:
+        spans.pop()
+        spans[-1] = (spans[-1][0], length)
+    return [normalized[s:e] for s, e in spans], spans
+
+
+@dataclass
+class ChunkColumns:
+    """Chunk metadata stored column-wise, one array per field instead of one dict per chunk.
+
+    ``columns[i]`` rebuilds the per-chunk metadata dict on demand, so consumers
+    such as ``VectorStoreManager.search`` only materialise dicts for the hits they return.
+    """
+
+    sources: List[str]
+    source_ids: np.ndarray  # int32 offsets into ``sources``
+    chunk_index: np.ndarray  # int32, position of the chunk within its document
+    char_length: np.ndarray  # int32
+    start: Optional[np.ndarray] = None  # int32 character spans, fixed-stride chunking only
+    end: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.chunk_index)
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        metadata: Dict[str, Any] = {
+            "source": self.sources[self.source_ids[position]],
+            "chunk_index": int(self.chunk_index[position]),
+            "char_length": int(self.char_length[position]),
         }
-        for index, chunk in enumerate(chunks)
-    ]
-    return chunks, metadata
+        if self.start is not None and self.end is not None:
+            metadata["start"] = int(self.start[position])
+            metadata["end"] = int(self.end[position])
+        return metadata
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self[position] for position in range(len(self)))
+
+    @classmethod
+    def concat(cls, parts: List[ChunkColumns]) -> ChunkColumns:
+        """Stack per-document columns into one corpus-wide set."""
+        if not parts:
+            empty = np.empty(0, dtype=np.int32)
+            return cls([], empty, empty, empty)
+        sources: List[str] = []
+        source_ids = []
+        for part in parts:
+            source_ids.append(part.source_ids + len(sources))
+            sources.extend(part.sources)
+        with_spans = all(part.start is not None and part.end is not None for part in parts)
+        return cls(
+            sources=sources,
+            source_ids=np.concatenate(source_ids),
+            chunk_index=np.concatenate([part.chunk_index for part in parts]),
+            char_length=np.concatenate([part.char_length for part in parts]),
+            start=np.concatenate([part.start for part in parts]) if with_spans else None,
+            end=np.concatenate([part.end for part in parts]) if with_spans else None,
+        )
+
+
+def chunk_text_columns(
+    text: str, chunk_config: ChunkConfig, source: str | None = None
+) -> Tuple[List[str], ChunkColumns]:
+    """Like :func:`chunk_text_with_metadata`, but return metadata as :class:`ChunkColumns`."""
+    source = source or "document"
+    if chunk_config.respect_separators:
+        chunks = chunk_text(
+            text,
+            chunk_size=chunk_config.chunk_size,
+            chunk_overlap=chunk_config.chunk_overlap,
+            separators=chunk_config.separators,
+        )
+        char_length = np.fromiter(map(len, chunks), dtype=np.int32, count=len(chunks))
+        start = end = None
+    else:
+        chunks, spans = _chunk_by_stride(
+            text,
+            chunk_config.chunk_size,
+            chunk_config.chunk_overlap,
+            chunk_config.min_chunk_size,
+        )
+        start, end = np.asarray(spans, dtype=np.int32).reshape(-1, 2).T
+        char_length = end - start
+    count = len(chunks)
+    columns = ChunkColumns(
+        sources=[source],
+        source_ids=np.zeros(count, dtype=np.int32),
+        chunk_index=np.arange(count, dtype=np.int32),
+        char_length=char_length,
+        start=start,
+        end=end,
+    )
+    return chunks, columns
+
+
+def chunk_text_with_metadata(text: str, chunk_config: ChunkConfig, source: str | None = None):
+    """Return chunk texts alongside lightweight metadata for tracing.
+
+    Windows are fixed-stride by default; set ``chunk_config.respect_separators``
+    to end chunks on natural boundaries via :func:`chunk_text` instead.
+    """
+    chunks, columns = chunk_text_columns(text, chunk_config, source)
+    return chunks, list(columns)
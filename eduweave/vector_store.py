@@ -2,11 +2,24 @@
 
 from __future__ import annotations
 
+import hashlib
+import importlib.util
+import json
+import math
+import os
+import pickle
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional
 
 import faiss
 import numpy as np
+import torch
 
 try:  # Defensive import: some envs lazy-load AutoConfig which sentence-transformers expects
     from transformers import AutoConfig as _  # noqa: F401
@@ -17,6 +30,173 @@ except ImportError:
     setattr(transformers, "AutoConfig", AutoConfig)
 
 from sentence_transformers import SentenceTransformer
+from sentence_transformers.models import Normalize, Pooling
+from sentence_transformers.util import batch_to_device
+
+from .text_processing import ChunkColumns
+
+
+def _sentence_max_length(model_name: str, fallback: int) -> int:
+    """``max_seq_length`` from the model's ``sentence_bert_config.json``, as SentenceTransformer truncates.
+
+    all-MiniLM-L6-v2 uses 256 tokens while its tokenizer allows 512.
+    """
+    try:
+        if Path(model_name).is_dir():
+            config_path = Path(model_name) / "sentence_bert_config.json"
+        else:
+            from huggingface_hub import hf_hub_download
+
+            config_path = Path(hf_hub_download(model_name, "sentence_bert_config.json"))
+        with config_path.open("r", encoding="utf-8") as handle:
+            return int(json.load(handle)["max_seq_length"])
+    except (OSError, ValueError, KeyError, TypeError):  # no sentence-transformers config: use the tokenizer's limit
+        return fallback
+
+
+class _OnnxEmbedder:
+    """ONNX Runtime feature extractor exposing the subset of ``SentenceTransformer.encode`` we use.
+
+    Mirrors the mean-pooling + L2-normalise head of sentence-transformers models
+    such as all-MiniLM-L6-v2, including their ``max_seq_length`` truncation. With
+    ``export_dir`` the exported model is saved there once and reloaded on later starts.
+    """
+
+    def __init__(self, model_name: str, export_dir: Optional[str] = None):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.max_length = _sentence_max_length(model_name, self.tokenizer.model_max_length)
+        target = Path(export_dir) / model_name.replace("/", "__") if export_dir else None
+        if target is not None and (target / "model.onnx").exists():
+            self.model = ORTModelForFeatureExtraction.from_pretrained(target, provider="CPUExecutionProvider")
+            return
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_name,
+            export=True,
+            provider="CPUExecutionProvider",
+        )
+        if target is not None:
+            # Save under a scratch name then rename, so a half-written export is never reloaded.
+            scratch = None
+            try:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                scratch = tempfile.mkdtemp(dir=target.parent)
+                self.model.save_pretrained(scratch)
+                os.replace(scratch, target)
+            except OSError:
+                if scratch is not None:
+                    shutil.rmtree(scratch, ignore_errors=True)  # exported again on the next start
+
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = True,
+        **_: Any,
+    ) -> np.ndarray:
+        # Length-sorted batches keep padding low, as sentence-transformers does.
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            batch = [texts[i] for i in order[start : start + batch_size]]
+            inputs = self.tokenizer(
+                batch, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+            )
+            hidden = self.model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            batches.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        vectors = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.concatenate(batches)
+        if normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+
+def _onnx_available() -> bool:
+    return importlib.util.find_spec("optimum") is not None and importlib.util.find_spec("onnxruntime") is not None
+
+
+def _resolved_backend(backend: str, device: str) -> str:
+    """The backend :func:`_load_embedder` actually uses: ONNX only on CPU with optimum installed."""
+    return "onnx" if backend == "onnx" and not device.startswith("cuda") and _onnx_available() else "torch"
+
+
+@lru_cache(maxsize=2)
+def _load_embedder(
+    model_name: str,
+    device: str = "cpu",
+    quantize: bool = False,
+    backend: str = "torch",
+    onnx_export_dir: Optional[str] = None,
+) -> SentenceTransformer | _OnnxEmbedder:
+    """Load embedding weights once per process so reruns and rebuilds reuse them.
+
+    ``backend="onnx"`` exports the model to ONNX Runtime on CPU when optimum is
+    installed (reusing an export saved under ``onnx_export_dir``), else falls back
+    to sentence-transformers. With ``quantize`` the torch encoder runs in fp16 on
+    CUDA, or with int8 dynamic quantization of its Linear layers on CPU.
+    """
+    if not device.startswith("cuda"):
+        # Let MKL / oneDNN use every core; some builds default to far fewer intra-op threads.
+        torch.set_num_threads(max(1, os.cpu_count() or 1))
+    if _resolved_backend(backend, device) == "onnx":
+        return _OnnxEmbedder(model_name, onnx_export_dir)
+    embedder = SentenceTransformer(model_name, device=device)
+    if not quantize:
+        return embedder
+    if device.startswith("cuda"):
+        return embedder.half()
+    return torch.ao.quantization.quantize_dynamic(embedder, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _mean_pool_normalize(token_embeddings: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    """Masked mean over tokens then L2 normalisation, matching ``Pooling("mean")`` + ``Normalize``."""
+    mask = attention_mask.unsqueeze(-1).to(torch.float32)
+    pooled = (token_embeddings.float() * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+    return torch.nn.functional.normalize(pooled, dim=1)
+
+
+@lru_cache(maxsize=1)
+def _fused_mean_pool():
+    # dynamic=True: batch size and padded length change with every batch.
+    return torch.compile(_mean_pool_normalize, dynamic=True)
+
+
+def corpus_fingerprint(texts: Iterable[str], embedding_model: str) -> str:
+    """Stable hash of chunk texts plus embedding model, used to key cached indexes."""
+    digest = hashlib.blake2b(embedding_model.encode("utf-8"), digest_size=16)
+    for text in texts:
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+_SCALAR_QUANTIZERS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def _pq_subquantizers(dimension: int, preferred: int) -> int:
+    """Largest sub-quantizer count <= ``preferred`` that divides ``dimension`` evenly."""
+    for m in range(min(preferred, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+@dataclass
+class CachedQuery:
+    """A recently answered query: its embedding, retrieved hits and (optionally) the answer."""
+
+    vector: np.ndarray
+    question: str
+    top_k: int
+    hits: List[Dict[str, Any]]
+    answer: Optional[str] = None
+    temperature: Optional[float] = None
 
 
 @dataclass
@@ -25,68 +205,426 @@ class VectorStoreManager:
 
     embedding_model: str
     device: Optional[str] = None
-    batch_size: int = 32
+    batch_size: int = 64
+    embed_prefetch: int = 2  # batches tokenized ahead of the running forward pass during build()
+    quantize_embedder: bool = True  # fp16 on CUDA, int8 dynamic quantization on CPU
+    embedding_backend: str = "torch"  # "onnx" runs the encoder through ONNX Runtime (needs optimum[onnxruntime])
+    onnx_export_dir: Optional[Path] = None  # keeps the ONNX export across restarts; re-exported per process if unset
+    compile_pooling: bool = True  # fuse mean-pool + normalize with torch.compile on CUDA; disable without inductor
+    cache_dir: Optional[Path] = None  # per-chunk embedding cache, keyed by model and content hash
+    cache_max_entries: int = 100_000  # least recently used cached embeddings beyond this are deleted after a build
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 64
+    # "pq" (IVF-PQ), "fp16" / "sq8" (HNSW over scalar codes), "fp32" (HNSW, full precision) or "flat" (always exact)
+    quant: str = "sq8"
+    ann_min_vectors: int = 10_000  # below this many chunks an exact scan is used (over scalar codes for fp16 / sq8)
+    nlist: Optional[int] = None  # IVF cells; defaults to 4 * sqrt(N)
+    m_pq: int = 48  # PQ sub-quantizers, rounded down to a divisor of the dimension
+    nprobe: int = 16
+    # Move the index to the GPU when ``device`` is CUDA and faiss has GPU support. Only quant="flat" and
+    # "pq" (and "fp32" below ann_min_vectors) produce flat / IVF indexes; sq8 / fp16 / HNSW stay on the CPU.
+    gpu_index: bool = True
+    query_cache_size: int = 64
+    query_sim_threshold: float = 0.97
     text_chunks: List[str] = field(default_factory=list)
-    metadatas: List[Dict[str, Any]] = field(default_factory=list)
-    full_text: str = ""
+    metadatas: List[Dict[str, Any]] | ChunkColumns = field(default_factory=list)  # columns build dicts per hit
+    full_text: str = ""  # optional whole-document text; chunks are joined lazily when empty
+    corpus_hash: str = ""
 
     def __post_init__(self):
-        self._embedder: Optional[SentenceTransformer] = None
-        self._index: Optional[faiss.IndexFlatL2] = None
+        self._embedder: Optional[SentenceTransformer | _OnnxEmbedder] = None
+        self._index: Optional[faiss.Index] = None
+        self._gpu_resources = None  # must outlive any GPU index created from it
         self._dimension: Optional[int] = None
+        self._query_cache: Deque[CachedQuery] = deque(maxlen=self.query_cache_size)
 
     @property
-    def embedder(self) -> SentenceTransformer:
+    def embedder(self) -> SentenceTransformer | _OnnxEmbedder:
         if self._embedder is None:
-            self._embedder = SentenceTransformer(self.embedding_model, device=self.device or "cpu")
+            self._embedder = _load_embedder(
+                self.embedding_model,
+                self.device or "cpu",
+                self.quantize_embedder,
+                self.embedding_backend,
+                str(self.onnx_export_dir) if self.onnx_export_dir else None,
+            )
         return self._embedder
 
     def _embed_batch(self, texts: List[str]) -> np.ndarray:
-        vectors = self.embedder.encode(
-            texts,
-            batch_size=self.batch_size,
-            convert_to_numpy=True,
-            show_progress_bar=False,
-            normalize_embeddings=True,
+        # encode() only disables grad; inference_mode also skips version-counter bookkeeping.
+        with torch.inference_mode():
+            vectors = self.embedder.encode(
+                texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                normalize_embeddings=True,
+            )
+        # encode() already returns float32; only copy if the layout or dtype differs.
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def _uses_fused_pooling(self, embedder: SentenceTransformer) -> bool:
+        """True for a CUDA transformer -> mean Pooling (-> Normalize) stack, the shape the fused tail reproduces."""
+        if not (self.compile_pooling and embedder.device.type == "cuda"):
+            return False
+        modules = list(embedder)
+        return (
+            len(modules) in (2, 3)
+            and isinstance(modules[1], Pooling)
+            and modules[1].get_pooling_mode_str() == "mean"
+            and all(isinstance(module, Normalize) for module in modules[2:])
         )
-        return vectors.astype("float32")
 
-    def build(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> None:
-        """Create a FAISS index from prepared chunk texts."""
+    def _sentence_embeddings(self, embedder: SentenceTransformer, features: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """Run the encoder on tokenized ``features``; returns L2-normalised float32 rows. Call under inference_mode."""
+        if self._uses_fused_pooling(embedder):
+            token_embeddings = embedder[0](features)["token_embeddings"]
+            return _fused_mean_pool()(token_embeddings, features["attention_mask"])
+        output = embedder.forward(features)["sentence_embedding"]
+        return torch.nn.functional.normalize(output.float(), dim=1)
+
+    def _embed_pipelined(self, texts: List[str]) -> np.ndarray:
+        """Encode many texts, tokenizing upcoming batches on a worker thread during each forward pass.
+
+        A single tokenizer thread is used on purpose: fast tokenizers are not safe to
+        call concurrently, while tokenization itself overlaps the model forward well.
+        """
+        embedder = self.embedder
+        if not isinstance(embedder, SentenceTransformer) or len(texts) <= self.batch_size:
+            return self._embed_batch(texts)
+
+        # Longest first, like SentenceTransformer.encode, so each batch pads to similar lengths.
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        batches = [order[start : start + self.batch_size] for start in range(0, len(order), self.batch_size)]
+        prefetch = max(1, self.embed_prefetch)
+        vectors: Optional[np.ndarray] = None
+        with ThreadPoolExecutor(max_workers=1) as tokenizer_pool:
+
+            def tokenize(positions: List[int]):
+                return tokenizer_pool.submit(embedder.tokenize, [texts[i] for i in positions])
+
+            pending = deque(tokenize(positions) for positions in batches[:prefetch])
+            for step, positions in enumerate(batches):
+                features = pending.popleft().result()
+                if step + prefetch < len(batches):
+                    pending.append(tokenize(batches[step + prefetch]))
+                with torch.inference_mode():
+                    batch = self._sentence_embeddings(embedder, batch_to_device(features, embedder.device))
+                if vectors is None:
+                    vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+                vectors[positions] = batch.cpu().numpy()
+        return vectors
+
+    def _embedding_cache_path(self) -> Path:
+        # Each encoder variant produces slightly different vectors, so each gets its own namespace:
+        # ONNX, torch fp32, torch fp16 (CUDA) and torch int8 (CPU).
+        device = self.device or "cpu"
+        backend = _resolved_backend(self.embedding_backend, device)
+        variant = f"{backend}-{torch.device(device).type}"
+        if backend == "torch" and self.quantize_embedder:
+            variant += "-q"
+        return Path(self.cache_dir) / f"{self.embedding_model.replace('/', '__')}-{variant}"
+
+    def _embed_cached(self, texts: List[str]) -> np.ndarray:
+        """Embed ``texts``, reusing vectors cached on disk and encoding only the misses."""
+        if self.cache_dir is None:
+            return self._embed_pipelined(texts)
+        cache = self._embedding_cache_path()
+        cache.mkdir(parents=True, exist_ok=True)
+
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        misses: Dict[str, List[int]] = {}
+        for position, text in enumerate(texts):
+            key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+            path = cache / f"{key}.npy"
+            if key not in misses and path.exists():
+                try:
+                    vectors[position] = np.load(path)
+                    os.utime(path)  # refresh the entry's age so pruning drops the least recently used
+                    continue
+                except (OSError, EOFError, ValueError):  # truncated or corrupt entry: re-embed it
+                    pass
+            misses.setdefault(key, []).append(position)
+
+        if misses:
+            fresh = self._embed_pipelined([texts[positions[0]] for positions in misses.values()])
+            for (key, positions), vector in zip(misses.items(), fresh):
+                self._write_cache_entry(cache / f"{key}.npy", vector)
+                for position in positions:
+                    vectors[position] = vector
+            self._prune_embedding_cache(cache)
+        return np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+
+    @staticmethod
+    def _write_cache_entry(path: Path, vector: np.ndarray) -> None:
+        """Write then rename, so concurrent builds and crashes never expose a partial entry."""
+        fd, scratch = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                np.save(handle, vector)
+            os.replace(scratch, path)
+        except OSError:
+            Path(scratch).unlink(missing_ok=True)  # the vector is still used; it is just not cached
+
+    def _prune_embedding_cache(self, cache: Path) -> None:
+        """Delete the least recently used entries once the cache holds more than ``cache_max_entries``."""
+        aged = []
+        for path in cache.glob("*.npy"):
+            try:
+                aged.append((path.stat().st_mtime, path))
+            except OSError:  # removed by a concurrent prune
+                pass
+        aged.sort()
+        for _, path in aged[: max(len(aged) - max(self.cache_max_entries, 0), 0)]:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass  # still open elsewhere on Windows; retried on the next build
+
+    def _create_index(self, matrix: np.ndarray) -> faiss.Index:
+        """Pick an inner-product index (cosine on unit vectors) suited to the corpus size."""
+        count, dim = matrix.shape
+        if self.quant == "flat":
+            return faiss.IndexFlatIP(dim)
+        if count < self.ann_min_vectors:
+            # Small corpora: an exact scan is already fast and avoids ANN recall loss.
+            if self.quant in _SCALAR_QUANTIZERS:
+                # Same scan over 2- or 1-byte codes, so more of the index stays cache-resident.
+                index = faiss.IndexScalarQuantizer(dim, _SCALAR_QUANTIZERS[self.quant], faiss.METRIC_INNER_PRODUCT)
+                index.train(matrix)
+                return index
+            return faiss.IndexFlatIP(dim)
+        if self.quant == "pq":
+            nlist = self.nlist or max(1, int(4 * math.sqrt(count)))
+            m = _pq_subquantizers(dim, self.m_pq)
+            index = faiss.index_factory(dim, f"IVF{nlist},PQ{m}x8", faiss.METRIC_INNER_PRODUCT)
+            index.train(matrix)
+            index.nprobe = self.nprobe
+            return index
+        if self.quant == "fp32":
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        elif self.quant in _SCALAR_QUANTIZERS:
+            index = faiss.IndexHNSWSQ(dim, _SCALAR_QUANTIZERS[self.quant], self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            # Only learns per-dimension ranges (a no-op for fp16), so training on the corpus is cheap.
+            index.train(matrix)
+        else:
+            raise ValueError(f"Unsupported quant setting: {self.quant!r}")
+        index.hnsw.efConstruction = self.ef_construction
+        index.hnsw.efSearch = self.ef_search
+        return index
+
+    def _to_gpu(self, index: faiss.Index) -> faiss.Index:
+        """Copy ``index`` onto the embedder's GPU so queries are searched there.
+
+        Only flat and IVF indexes have GPU implementations, and faiss-cpu builds
+        lack the GPU API; anything else keeps the CPU index. That includes the
+        default ``quant="sq8"`` indexes (``IndexScalarQuantizer`` / ``IndexHNSWSQ``).
+        """
+        if not (
+            self.gpu_index
+            and (self.device or "").startswith("cuda")
+            and torch.cuda.is_available()
+            and hasattr(faiss, "StandardGpuResources")
+            and isinstance(index, (faiss.IndexFlat, faiss.IndexIVF))
+        ):
+            return index
+        if self._gpu_resources is None:
+            self._gpu_resources = faiss.StandardGpuResources()
+        return faiss.index_cpu_to_gpu(self._gpu_resources, torch.device(self.device).index or 0, index)
+
+    def _cpu_index(self) -> faiss.Index:
+        if hasattr(faiss, "GpuIndex") and isinstance(self._index, faiss.GpuIndex):
+            return faiss.index_gpu_to_cpu(self._index)
+        return self._index
+
+    def _set_search_params(self, top_k: int, ef_search: Optional[int]) -> None:
+        if hasattr(self._index, "hnsw"):
+            # efSearch must cover top_k or HNSW returns fewer neighbours than requested.
+            self._index.hnsw.efSearch = max(ef_search or self.ef_search, top_k)
+        ivf = faiss.try_extract_index_ivf(self._index)
+        if ivf is not None:
+            ivf.nprobe = self.nprobe
+        elif hasattr(self._index, "nprobe"):  # GPU IVF indexes are not IndexIVF subclasses
+            self._index.nprobe = self.nprobe
+
+    def build(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]] | ChunkColumns] = None,
+    ) -> None:
+        """Create a FAISS index from prepared chunk texts and per-chunk dicts or :class:`ChunkColumns`."""
         if not texts:
             raise ValueError("No texts supplied for vector store construction.")
 
-        embeddings: List[np.ndarray] = []
-        for start in range(0, len(texts), self.batch_size):
-            batch = texts[start : start + self.batch_size]
-            embeddings.append(self._embed_batch(batch))
-
-        matrix = np.vstack(embeddings).astype("float32")
+        # Cache hits skip the encoder; misses are encoded in length-sorted, prefetched batches.
+        matrix = self._embed_cached(texts)
+        faiss.normalize_L2(matrix)
         self._dimension = matrix.shape[1]
-        self._index = faiss.IndexFlatL2(self._dimension)
-        self._index.add(matrix)
+        index = self._create_index(matrix)
+        index.add(matrix)
+        self._index = self._to_gpu(index)
 
+        self._query_cache.clear()
         self.text_chunks = texts
+        self.corpus_hash = corpus_fingerprint(texts, self.embedding_model)
         self.metadatas = metadatas or [{} for _ in texts]
-        self.full_text = " ".join(texts)
+        self.full_text = ""
+
+    def save(self, directory: str | Path) -> Path:
+        """Write ``<corpus_hash>.faiss`` plus a pickled sidecar of chunks and metadata."""
+        if not self.is_ready():
+            raise RuntimeError("Vector store has not been built yet.")
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        index_path = directory / f"{self.corpus_hash}.faiss"
+        state = {
+            "embedding_model": self.embedding_model,
+            "corpus_hash": self.corpus_hash,
+            "text_chunks": self.text_chunks,
+            "metadatas": self.metadatas,
+            "full_text": self.full_text,
+        }
+        # Write each file then rename it so an interrupted save never leaves a truncated file.
+        # The sidecar goes first: a ``.faiss`` file only appears once its state is complete.
+        sidecar = index_path.with_suffix(".pkl")
+        scratch = sidecar.with_suffix(".pkl.tmp")
+        with scratch.open("wb") as handle:
+            pickle.dump(state, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(scratch, sidecar)
+        scratch = index_path.with_suffix(".faiss.tmp")
+        faiss.write_index(self._cpu_index(), str(scratch))
+        os.replace(scratch, index_path)
+        return index_path
+
+    def load(self, index_path: str | Path, mmap: bool = True) -> None:
+        """Restore a saved index and its sidecar state.
+
+        ``mmap`` passes ``IO_FLAG_MMAP | IO_FLAG_READ_ONLY``, which faiss only honours
+        for IVF inverted lists (the IVF-PQ path): those pages are mapped on demand.
+        Flat, scalar-quantizer and HNSW indexes are read fully into memory either way.
+        """
+        index_path = Path(index_path)
+        with index_path.with_suffix(".pkl").open("rb") as handle:
+            state = pickle.load(handle)
+        if state["embedding_model"] != self.embedding_model:
+            raise ValueError(
+                f"Index at {index_path} was built with {state['embedding_model']}, not {self.embedding_model}."
+            )
+        io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+        self._index = self._to_gpu(faiss.read_index(str(index_path), io_flags))
+        self._dimension = self._index.d
+        self._query_cache.clear()
+        self.corpus_hash = state["corpus_hash"]
+        self.text_chunks = state["text_chunks"]
+        self.metadatas = state["metadatas"]
+        self.full_text = state.get("full_text", "")
 
     def is_ready(self) -> bool:
         return self._index is not None and len(self.text_chunks) > 0
 
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        if not self.is_ready():
-            raise RuntimeError("Vector store has not been built yet.")
-        query_vec = self._embed_batch([query])
-        scores, indices = self._index.search(query_vec, top_k)
+    def get_full_text(self, max_chars: Optional[int] = None) -> str:
+        """Corpus text for non-RAG prompts: ``full_text`` if set, else the chunks joined by spaces.
+
+        With ``max_chars`` the join stops as soon as the result exceeds that length,
+        so callers truncating to ``max_chars`` see the same prefix without the full copy.
+        """
+        if self.full_text or max_chars is None:
+            return self.full_text or " ".join(self.text_chunks)
+        pieces: List[str] = []
+        length = -1
+        for chunk in self.text_chunks:
+            pieces.append(chunk)
+            length += len(chunk) + 1
+            if length > max_chars:
+                break
+        return " ".join(pieces)
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        """Embed a single query as a ``(1, d)`` float32 row, skipping ``encode()``'s batch planning."""
+        embedder = self.embedder
+        if not isinstance(embedder, SentenceTransformer):
+            return self._embed_batch([text])
+        features = batch_to_device(embedder.tokenize([text]), embedder.device)
+        with torch.inference_mode():
+            vector = self._sentence_embeddings(embedder, features)
+        return vector.cpu().numpy()
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        query_vec = self._encode_one(query)
+        faiss.normalize_L2(query_vec)
+        return query_vec
+
+    def _search_vectors(self, query_vec: np.ndarray, top_k: int, ef_search: Optional[int]) -> List[Dict[str, Any]]:
+        return self._search_matrix(query_vec, top_k, ef_search)[0]
+
+    def _search_matrix(
+        self, query_vecs: np.ndarray, top_k: int, ef_search: Optional[int]
+    ) -> List[List[Dict[str, Any]]]:
+        """One FAISS call for all rows of ``query_vecs``; returns hits per row."""
+        self._set_search_params(top_k, ef_search)
+        scores, indices = self._index.search(query_vecs, top_k)
+        return [self._hits(row_indices, row_scores) for row_indices, row_scores in zip(indices, scores)]
+
+    def _hits(self, indices: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
         hits = []
-        for idx, distance in zip(indices[0], scores[0]):
+        for idx, score in zip(indices, scores):
             if idx == -1 or idx >= len(self.text_chunks):
                 continue
             hits.append(
                 {
                     "text": self.text_chunks[idx],
                     "metadata": self.metadatas[idx],
-                    "distance": float(distance),
+                    "score": float(score),  # cosine similarity, higher is better
                 }
             )
         return hits
+
+    def search(self, query: str, top_k: int = 5, ef_search: Optional[int] = None) -> List[Dict[str, Any]]:
+        if not self.is_ready():
+            raise RuntimeError("Vector store has not been built yet.")
+        return self._search_vectors(self._embed_query(query), top_k, ef_search)
+
+    def search_many(
+        self, queries: List[str], top_k: int = 5, ef_search: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search several queries with one embedding batch and one FAISS call, in input order."""
+        if not self.is_ready():
+            raise RuntimeError("Vector store has not been built yet.")
+        if not queries:
+            return []
+        query_vecs = self._embed_batch(queries)
+        faiss.normalize_L2(query_vecs)
+        return self._search_matrix(query_vecs, top_k, ef_search)
+
+    def cached_search(
+        self,
+        question: str,
+        top_k: int = 5,
+        ef_search: Optional[int] = None,
+        sim_threshold: Optional[float] = None,
+    ) -> CachedQuery:
+        """Search, reusing a recent query whose embedding is within ``sim_threshold`` cosine.
+
+        The returned entry is shared with the cache; callers may attach an answer to it.
+        """
+        if not self.is_ready():
+            raise RuntimeError("Vector store has not been built yet.")
+        threshold = self.query_sim_threshold if sim_threshold is None else sim_threshold
+        query_vec = self._embed_query(question)
+
+        candidates = [entry for entry in list(self._query_cache) if entry.top_k == top_k]
+        if candidates:
+            sims = np.stack([entry.vector for entry in candidates]) @ query_vec[0]
+            best = int(np.argmax(sims))
+            if sims[best] >= threshold:
+                return candidates[best]
+
+        entry = CachedQuery(
+            vector=query_vec[0],
+            question=question,
+            top_k=top_k,
+            hits=self._search_vectors(query_vec, top_k, ef_search),
+        )
+        self._query_cache.append(entry)
+        return entry
@@ -0,0 +1,33 @@
+import random
+import re
+
+from eduweave.rag import finalize_answer
+
+_PIECES = ("Foo", "bar", ".", "!", "?", " ", "  ", "\n", "\n\n", "Answer: ", "Question: x", "Context: y",
+           "EduWeave", "\t", ". ", "? ", "if the answer is missing")
+
+
+def _reference_finalize_answer(raw_answer):
+    """Multi-pass version: filter every line, join, then sentence-split the whole body."""
+    parts = re.split(r"(?i)\banswer\s*:\s*", raw_answer)
+    answer_body = parts[-1].strip() if len(parts) > 1 else raw_answer.strip()
+    cleaned_lines = []
+    for line in answer_body.splitlines():
+        if re.match(r"(?i)\s*(context|question)\s*:", line):
+            continue
+        if re.search(r"EduWeave|AI assistant|Avoid speculation|Keep responses concise", line, flags=re.IGNORECASE):
+            continue
+        cleaned_lines.append(line)
+    cleaned = " ".join(cleaned_lines).strip()
+    sentences = re.split(r"(?<=[.!?])\s+", cleaned)
+    answer = " ".join(sentences[:7]).strip() if sentences else cleaned
+    if not answer or "if the answer is missing" in answer.lower():
+        answer = "I cannot find the answer in the supplied notes."
+    return answer
+
+
+def test_finalize_answer_matches_multi_pass_reference():
+    rng = random.Random(0)
+    for _ in range(5000):
+        raw = "".join(rng.choice(_PIECES) for _ in range(rng.randint(0, 60)))
+        assert finalize_answer(raw) == _reference_finalize_answer(raw), raw
@@ -0,0 +1,75 @@
+import random
+from functools import partial
+
+from eduweave import text_processing
+from eduweave.config import ChunkConfig
+from eduweave.text_processing import _iter_normalized, _normalize_whitespace, chunk_text, chunk_text_with_metadata
+
+_PIECES = ("a", "b", "c", " ", "  ", "\n", "\n\n", ". ", "\t", "xxxxx", ".", " \n ", "\r\n")
+
+
+def _words(length: int) -> str:
+    text = " ".join(f"w{index}" for index in range(length))
+    return text[:length].rstrip() + "x"
+
+
+def test_stride_chunks_cover_every_character():
+    for length in (150, 830, 950, 1000, 1640, 5003):
+        for overlap in (0, 50, 150, 300):
+            text = _words(length)
+            normalized = _normalize_whitespace(text)
+            chunks, metadata = chunk_text_with_metadata(text, ChunkConfig(chunk_size=800, chunk_overlap=overlap))
+
+            covered = [False] * len(normalized)
+            for chunk, meta in zip(chunks, metadata):
+                assert normalized[meta["start"] : meta["end"]] == chunk
+                covered[meta["start"] : meta["end"]] = [True] * (meta["end"] - meta["start"])
+            assert all(covered), (length, overlap)
+
+
+def test_stride_tail_is_merged_into_previous_window():
+    text = _words(950)
+    chunks, metadata = chunk_text_with_metadata(text, ChunkConfig(chunk_size=800, chunk_overlap=0))
+    assert len(chunks) == 1
+    assert metadata[0]["end"] == len(_normalize_whitespace(text))
+
+
+def _reference_chunk_text(text, chunk_size, chunk_overlap, separators=("\n\n", "\n", ". ", " ", "")):
+    """Normalize-then-slice chunker that chunk_text's streaming version must reproduce."""
+    normalized = _normalize_whitespace(text)
+    chunks, start, length = [], 0, len(normalized)
+    while start < length:
+        end = min(start + chunk_size, length)
+        adjusted_end = end
+        for sep in separators:
+            idx = normalized[start:end].rfind(sep) if sep else -1
+            if idx != -1 and idx + len(sep.strip()) >= chunk_size * 0.6:
+                adjusted_end = start + idx + len(sep.strip())
+                break
+        chunk = normalized[start:adjusted_end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if adjusted_end >= length:
+            break
+        start = max(adjusted_end - chunk_overlap, 0)
+    return chunks
+
+
+def test_streaming_normalization_matches_full_normalization():
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = "".join(rng.choice(_PIECES) for _ in range(rng.randint(0, 80)))
+        for buf in (1, 2, 3, 7, 64):
+            assert "".join(_iter_normalized(text, buf)) == _normalize_whitespace(text), (text, buf)
+
+
+def test_chunk_text_matches_reference_for_small_read_buffers(monkeypatch):
+    rng = random.Random(1)
+    for _ in range(300):
+        text = "".join(rng.choice(_PIECES) for _ in range(rng.randint(0, 1500)))
+        chunk_size = rng.choice((200, 250, 400, 800))
+        chunk_overlap = rng.choice((0, 50, 100, 110))  # below the 0.6 * chunk_size boundary floor
+        buf = rng.choice((1, 2, 3, 7, 64, 1 << 20))
+        monkeypatch.setattr(text_processing, "_iter_normalized", partial(_iter_normalized, buf=buf))
+        expected = _reference_chunk_text(text, chunk_size, chunk_overlap)
+        assert chunk_text(text, chunk_size, chunk_overlap) == expected, (chunk_size, chunk_overlap, buf)